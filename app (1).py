@@ -1,12 +1,30 @@
 import os
-import json
-import random
-from datetime import datetime
-from flask import Flask, request, render_template_string, flash, redirect, url_for, session
+import re
+import time
+import itertools
+import hmac
+import hashlib
+import atexit
+import asyncio
+import threading
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from flask import Flask, request, render_template, stream_template, flash, redirect, url_for, session, get_flashed_messages
 from flask_sqlalchemy import SQLAlchemy
-from textblob import TextBlob
-import google.generativeai as genai
+from sqlalchemy import func, case, insert
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.exc import OperationalError
+from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+import httpx
+import orjson
 import requests
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerifyMismatchError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "dr_mind_secret_key_2024"
@@ -23,39 +41,137 @@ else:
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///drmind.db"
 
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# Use orjson for JSON columns (suggestions)
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "json_serializer": lambda obj: orjson.dumps(obj).decode(),
+    "json_deserializer": orjson.loads
+}
 
 db = SQLAlchemy(app)
 
+# Static assets are versioned by content hash so browsers can cache them indefinitely
+with open(os.path.join(app.static_folder, 'app.css'), 'rb') as f:
+    APP_CSS_VERSION = hashlib.sha1(f.read()).hexdigest()[:12]
+app.jinja_env.globals['app_css_version'] = APP_CSS_VERSION
+
 # --- AI API KEYS (SECURELY FROM ENVIRONMENT VARIABLES) ---
 GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
 HUGGINGFACE_API_KEY = os.environ.get("HUGGINGFACE_API_KEY")
 COHERE_API_KEY = os.environ.get("COHERE_API_KEY")
 
-# Configure Google AI
-try:
+HF_API_URL = "https://router.huggingface.co/v1/chat/completions"
+HF_MODEL = "meta-llama/Meta-Llama-3.1-8B-Instruct"
+HF_HEADERS = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}", "Content-Type": "application/json"}
+COHERE_HEADERS = {"Authorization": f"Bearer {COHERE_API_KEY}", "Content-Type": "application/json"}
+
+# Shared HTTP session for the /test/* API check routes (the batch worker uses HTTPX)
+HF_SESSION = requests.Session()
+HF_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=32,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+))
+
+# (connect, read) timeouts so a slow Hugging Face node can't block a worker indefinitely
+HF_TIMEOUT = (3.0, 10.0)
+HF_RETRY_TIMEOUT = (3.0, 15.0)
+
+# Async HTTP/2 client for the batch worker; concurrent batches share one connection
+HTTPX = httpx.AsyncClient(
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=100, keepalive_expiry=30),
+    timeout=httpx.Timeout(HF_TIMEOUT[1], connect=HF_TIMEOUT[0]),
+    http2=True
+)
+
+# Lexicon-based sentiment analyzer, loaded once and shared by all requests
+SENTIMENT_ANALYZER = SentimentIntensityAnalyzer()
+
+# Optional process pool for scoring larger write batches on multiple cores. Off by default
+# since every web worker would fork its own pool; set DRMIND_SENTIMENT_WORKERS to enable it.
+# It is created by init_sentiment_pool() right after the server forks, before any threads exist.
+SENTIMENT_POOL_WORKERS = min(int(os.environ.get("DRMIND_SENTIMENT_WORKERS", 0)), os.cpu_count() or 1)
+SENTIMENT_POOL_MIN_BATCH = 4
+SENTIMENT_TIMEOUT = 1.0  # seconds
+_sentiment_pool = None
+_sentiment_pool_lock = threading.Lock()
+
+# Background workers for slow AI calls so they don't block the request thread
+EXECUTOR = ThreadPoolExecutor(max_workers=16)
+
+# Entries waiting for an AI response, sent to Hugging Face together in one prompt
+PENDING = []
+PENDING_COND = threading.Condition()
+BATCH_SIZE = 8
+BATCH_MAX_AGE = 0.5  # seconds
+_batch_thread = None
+_ai_loop = None
+# Entries still without a reply after this long lost their batch (e.g. the worker was
+# killed or restarted mid-request) and get the fallback reply when next shown
+AI_REPLY_TIMEOUT = 120  # seconds
+
+# New entries are buffered and written with one multi-row INSERT per flush
+WRITE_BUFFER = deque()
+WRITE_BUFFER_FULL = threading.Event()
+WRITE_BATCH_SIZE = 32
+WRITE_FLUSH_INTERVAL = 0.2  # seconds
+_writer_thread = None
+_writer_lock = threading.Lock()
+_flush_lock = threading.Lock()
+# Flushes that failed on a transient database error are retried with backoff, then dropped
+WRITE_MAX_RETRIES = 10
+_write_failures = 0
+
+@lru_cache(maxsize=1)
+def _genai():
+    """Import and configure Google AI on first use (no handler uses it yet)"""
+    import google.generativeai as genai
     genai.configure(api_key=GOOGLE_API_KEY)
-except Exception as e:
-    print(f"Google AI configuration error: {e}")
+    return genai
+
+JOURNAL_MAX_LENGTH = 1000
 
 class MoodEntry(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     mood = db.Column(db.String(50), nullable=False)
-    journal = db.Column(db.String(1000))
+    journal = db.Column(db.String(JOURNAL_MAX_LENGTH))
     sentiment = db.Column(db.Float)
     comfort_message = db.Column(db.String(500))
-    suggestions = db.Column(db.String(1000))
-    date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    suggestions = db.Column(db.JSON().with_variant(JSONB(), 'postgresql'))
+    date = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(100), nullable=False)
     last_name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(100), unique=True, nullable=False)
-    password = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(100), unique=True, index=True, nullable=False)
+    password = db.Column(db.String(255), nullable=False)
 
     def __repr__(self):
         return f"User('{self.email}')"
 
+# Password hashing and policy (lowercase, uppercase, digit, special character, 8+ chars)
+PASSWORD_HASHER = PasswordHasher()
+PASSWORD_SPECIAL_CHARS = '!@#$%^&*()_+-=[]{}|;:",.<>/?'
+PW_POLICY = re.compile(rf'(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[{re.escape(PASSWORD_SPECIAL_CHARS)}]).{{8,}}', re.DOTALL)
+
+def check_password(user, password):
+    """Verify a login password, upgrading legacy plaintext or outdated hashes"""
+    if not user.password.startswith("$argon2"):
+        # Accounts created before hashing was added store the password as-is
+        if not hmac.compare_digest(user.password.encode(), password.encode()):
+            return False
+        user.password = PASSWORD_HASHER.hash(password)
+        db.session.commit()
+        return True
+    try:
+        PASSWORD_HASHER.verify(user.password, password)
+    except (VerifyMismatchError, InvalidHashError):
+        return False
+    if PASSWORD_HASHER.check_needs_rehash(user.password):
+        user.password = PASSWORD_HASHER.hash(password)
+        db.session.commit()
+    return True
+
 # Comprehensive mood options
 MOODS = [
     {"emoji": "😃", "label": "Joyful", "value": 0.9},
@@ -79,9 +195,13 @@ MOODS = [
     {"emoji": "😰", "label": "Overwhelmed", "value": -0.7},
     {"emoji": "😭", "label": "Devastated", "value": -0.9}
 ]
+MOOD_EMOJI = {m['label']: m['emoji'] for m in MOODS}
+
+# Number of journal entries shown on the dashboard
+RECENT_ENTRIES = 20
 
 # Motivational quotes
-QUOTES = [
+QUOTES = (
     "Every day may not be good, but there is something good in every day.",
     "You are stronger than you think.",
     "Progress, not perfection.",
@@ -97,122 +217,368 @@ QUOTES = [
     "It's okay to not be okay.",
     "Your mental health is a priority.",
     "You are worthy of love and respect."
-]
+)
+
+# Rotates through options per call; cheaper than random.choice and needs no lock
+_COUNTER = itertools.count()
+
+def pick(options):
+    """Pick the next option in rotation"""
+    return options[next(_COUNTER) % len(options)]
+
+# One pass over the model's reply: a "COMFORT:" line or a "-"/"•" bulleted suggestion
+PARSE_RE = re.compile(r'COMFORT:[ \t]*(?P<comfort>[^\n]*)|^[ \t]*[-•][ \t]*(?P<sugg>[^\n]+)', re.MULTILINE)
+
+# "Entry [n]" marker opening each answer in a batched reply; only at a line start so a
+# reply that mentions another entry mid-sentence is not split there
+ENTRY_MARKER_RE = re.compile(r'^Entry \[(\d+)\]:?', re.MULTILINE)
+
+async def post_huggingface_async(data):
+    """POST to the Hugging Face chat endpoint, retrying once on timeout or 5xx"""
+    response = None
+    for timeout in (HF_TIMEOUT, HF_RETRY_TIMEOUT):
+        try:
+            response = await HTTPX.post(HF_API_URL, headers=HF_HEADERS, json=data,
+                                        timeout=httpx.Timeout(timeout[1], connect=timeout[0]))
+        except httpx.TimeoutException:
+            print(f"⏱️ Hugging Face API timed out after {timeout[1]:.0f}s")
+            continue
+        print(f"🤖 Hugging Face API responded in {response.elapsed.total_seconds():.2f}s ({response.status_code})")
+        if response.status_code < 500:
+            break
+    return response
+
+def parse_ai_response(mood, ai_response):
+    """Extract the comfort message and suggestions from the model's reply"""
+    comfort = ""
+    suggestions = []
+
+    for match in PARSE_RE.finditer(ai_response):
+        if match.lastgroup == 'comfort':
+            if not comfort:
+                comfort = match.group('comfort').strip()
+        elif len(suggestions) < 3:
+            suggestions.append(match.group('sugg').strip())
+        if comfort and len(suggestions) == 3:
+            break
+
+    if not comfort:
+        comfort = f"I understand you're feeling {mood.lower()}. Your feelings are valid and important."
+
+    if not suggestions:
+        suggestions = [
+            "Take a moment to breathe deeply and center yourself",
+            "Write down your thoughts to help process them",
+            "Reach out to someone you trust for support"
+        ]
+
+    return {'comfort': comfort, 'suggestions': suggestions[:3]}
 
-def get_huggingface_ai_response(mood, journal, sentiment):
-    """Get AI response using Hugging Face Inference API (FREE)"""
+def build_ai_prompt(mood, journal, sentiment):
+    """Prompt asking for a comfort message and suggestions for one entry"""
+    return f"You are Dr. Mind, a compassionate AI mental health companion. The user wrote: \"{journal}\" and selected the mood: \"{mood}\" with a sentiment score of {sentiment:.2f}. Please provide a warm, empathetic comfort message (2-3 sentences) and three actionable, practical suggestions for what to do next. Format your response as: COMFORT: [your comfort message here] SUGGESTIONS: - [suggestion 1] - [suggestion 2] - [suggestion 3]"
+
+# Fallback comfort messages and suggestions by sentiment bucket (negative, neutral, positive)
+COMFORT_NEG = (
+    "I hear you, and your feelings are completely valid. It's okay to not be okay.",
+    "Your emotions are real and important. You don't have to rush through this difficult time.",
+    "It takes courage to acknowledge when we're struggling. You're showing strength by being honest."
+)
+COMFORT_NEU = (
+    "It's perfectly okay to feel neutral. Every emotion has its place in our journey.",
+    "Neutral moments are often when we can best observe and understand ourselves.",
+    "There's wisdom in accepting all our emotional states, including the calm neutral ones."
+)
+COMFORT_POS = (
+    "It's wonderful to see you in such a positive space! Your energy is contagious and inspiring.",
+    "Your positive outlook is truly beautiful. This kind of energy can create amazing ripples in your life.",
+    "What a joy to witness your happiness! These moments of positivity are precious and worth celebrating."
+)
+
+SUGG_NEG = (
+    "Practice self-compassion - be as kind to yourself as you would be to a friend",
+    "Try some gentle physical activity like walking or stretching",
+    "Consider talking to someone you trust about how you're feeling"
+)
+SUGG_NEU = (
+    "Take a moment to practice mindfulness or meditation",
+    "Try a new activity to add some variety to your day",
+    "Connect with a friend or family member"
+)
+SUGG_POS = (
+    "Share this positive energy with someone who might need it",
+    "Document this feeling to remember it during tougher times",
+    "Use this momentum to tackle something you've been putting off"
+)
+
+FALLBACK_COMFORT = (COMFORT_NEG, COMFORT_NEU, COMFORT_POS)
+FALLBACK_SUGGESTIONS = (SUGG_NEG, SUGG_NEU, SUGG_POS)
+
+def get_fallback_response(mood, journal, sentiment):
+    """Fallback response when AI APIs are not available"""
+    # 0 = negative (< -0.3), 1 = neutral, 2 = positive (> 0.3)
+    idx = (sentiment > 0.3) - (sentiment < -0.3) + 1
+    return {'comfort': pick(FALLBACK_COMFORT[idx]), 'suggestions': FALLBACK_SUGGESTIONS[idx]}
+
+def build_batch_request(batch):
+    """Chat completion payload covering every entry in the batch"""
+    if len(batch) == 1:
+        _, mood, journal, sentiment = batch[0]
+        prompt = build_ai_prompt(mood, journal, sentiment)
+    else:
+        entries_text = "\n".join(
+            f"Entry [{i}]: mood=\"{mood}\" sentiment={sentiment:.2f} journal=\"{journal}\""
+            for i, (_, mood, journal, sentiment) in enumerate(batch, 1)
+        )
+        prompt = f"You are Dr. Mind, a compassionate AI mental health companion. Below are {len(batch)} journal entries from different users, each with the mood they selected and a sentiment score. For each entry, provide a warm, empathetic comfort message (2-3 sentences) and three actionable, practical suggestions for what to do next. Start each answer with its marker exactly as given (e.g. Entry [1]) and format it as: COMFORT: [your comfort message here] SUGGESTIONS: - [suggestion 1] - [suggestion 2] - [suggestion 3]\n\n{entries_text}"
+    return {"model": HF_MODEL, "messages": [{"role": "user", "content": prompt}]}
+
+def parse_batch_reply(batch, ai_response):
+    """Split a batched reply on its Entry [n] markers; unanswered entries get the fallback"""
+    answers = {}
+    if ai_response is not None and len(batch) == 1:
+        answers = {1: ai_response}
+    elif ai_response is not None:
+        parts = ENTRY_MARKER_RE.split(ai_response)
+        answers = {int(index): text for index, text in zip(parts[1::2], parts[2::2])}
+
+    responses = []
+    for i, (_, mood, journal, sentiment) in enumerate(batch, 1):
+        if i in answers:
+            responses.append(parse_ai_response(mood, answers[i]))
+        else:
+            responses.append(get_fallback_response(mood, journal, sentiment))
+    return responses
+
+async def fetch_batch_ai_responses(batch):
+    """Get AI responses for several entries with a single Hugging Face request"""
+    ai_response = None
     try:
-        API_URL = "https://router.huggingface.co/v1/chat/completions"
-        
-        prompt = f"You are Dr. Mind, a compassionate AI mental health companion. The user wrote: \"{journal}\" and selected the mood: \"{mood}\" with a sentiment score of {sentiment:.2f}. Please provide a warm, empathetic comfort message (2-3 sentences) and three actionable, practical suggestions for what to do next. Format your response as: COMFORT: [your comfort message here] SUGGESTIONS: - [suggestion 1] - [suggestion 2] - [suggestion 3]"
-        messages = [{"role": "user", "content": prompt}]
-        
-        headers = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}", "Content-Type": "application/json"}
-        data = {"model": "meta-llama/Meta-Llama-3.1-8B-Instruct", "messages": messages}
-        
-        response = requests.post(API_URL, headers=headers, json=data)
-        
-        if response.status_code == 200:
-            result = response.json()
+        response = await post_huggingface_async(build_batch_request(batch))
+        if response is not None and response.status_code == 200:
+            result = orjson.loads(response.content)
             if isinstance(result, dict) and result.get("choices"):
                 ai_response = result["choices"][0]["message"]["content"]
-                
-                lines = ai_response.split('\n')
-                comfort = ""
-                suggestions = []
-                
-                for line in lines:
-                    if 'COMFORT:' in line:
-                        comfort = line.replace('COMFORT:', '').strip()
-                    elif line.strip().startswith('-') or line.strip().startswith('•'):
-                        suggestions.append(line.strip().lstrip('- ').lstrip('• '))
-                
-                if not comfort:
-                    comfort = f"I understand you're feeling {mood.lower()}. Your feelings are valid and important."
-                
-                if not suggestions:
-                    suggestions = [
-                        "Take a moment to breathe deeply and center yourself",
-                        "Write down your thoughts to help process them",
-                        "Reach out to someone you trust for support"
-                    ]
-                
-                return {'comfort': comfort, 'suggestions': suggestions[:3]}
-        
-        print("🤖 Hugging Face API failed, using fallback system...")
-        return get_fallback_response(mood, journal, sentiment)
-        
     except Exception as e:
-        print(f"🤖 Hugging Face API error: {e}")
-        return get_fallback_response(mood, journal, sentiment)
+        print(f"🤖 Hugging Face batch API error: {e}")
+    return parse_batch_reply(batch, ai_response)
 
-def get_fallback_response(mood, journal, sentiment):
-    """Fallback response when AI APIs are not available"""
-    
-    comfort_messages = {
-        'positive': [
-            "It's wonderful to see you in such a positive space! Your energy is contagious and inspiring.",
-            "Your positive outlook is truly beautiful. This kind of energy can create amazing ripples in your life.",
-            "What a joy to witness your happiness! These moments of positivity are precious and worth celebrating."
-        ],
-        'neutral': [
-            "It's perfectly okay to feel neutral. Every emotion has its place in our journey.",
-            "Neutral moments are often when we can best observe and understand ourselves.",
-            "There's wisdom in accepting all our emotional states, including the calm neutral ones."
-        ],
-        'negative': [
-            "I hear you, and your feelings are completely valid. It's okay to not be okay.",
-            "Your emotions are real and important. You don't have to rush through this difficult time.",
-            "It takes courage to acknowledge when we're struggling. You're showing strength by being honest."
-        ]
-    }
-    
-    suggestions_database = {
-        'positive': [
-            "Share this positive energy with someone who might need it",
-            "Document this feeling to remember it during tougher times",
-            "Use this momentum to tackle something you've been putting off"
-        ],
-        'neutral': [
-            "Take a moment to practice mindfulness or meditation",
-            "Try a new activity to add some variety to your day",
-            "Connect with a friend or family member"
-        ],
-        'negative': [
-            "Practice self-compassion - be as kind to yourself as you would be to a friend",
-            "Try some gentle physical activity like walking or stretching",
-            "Consider talking to someone you trust about how you're feeling"
-        ]
-    }
-    
-    if sentiment > 0.3:
-        category = 'positive'
-    elif sentiment < -0.3:
-        category = 'negative'
-    else:
-        category = 'neutral'
-    
-    comfort = random.choice(comfort_messages[category])
-    final_suggestions = suggestions_database[category]
-    
-    return {'comfort': comfort, 'suggestions': final_suggestions}
+def save_ai_responses(batch, responses):
+    """Store generated AI responses on their entries (runs on EXECUTOR)"""
+    # If the AI replies can't be saved (e.g. a comfort message too long for the column),
+    # retry once with fallback responses so no entry is left without a reply
+    fallbacks = [get_fallback_response(mood, journal, sentiment) for _, mood, journal, sentiment in batch]
+    for attempt, attempt_responses in enumerate((responses, fallbacks), 1):
+        try:
+            with app.app_context():
+                for (entry_id, _, _, _), ai_response in zip(batch, attempt_responses):
+                    entry = db.session.get(MoodEntry, entry_id)
+                    if entry:
+                        entry.comfort_message = ai_response['comfort']
+                        entry.suggestions = ai_response['suggestions']
+                db.session.commit()
+            return
+        except Exception as e:
+            print(f"🤖 Background AI response error (attempt {attempt}): {e}")
+
+async def process_batch(batch):
+    responses = await fetch_batch_ai_responses(batch)
+    await asyncio.get_running_loop().run_in_executor(EXECUTOR, save_ai_responses, batch, responses)
+
+async def flush_batches(batches):
+    """Send all ready batches to Hugging Face concurrently"""
+    await asyncio.gather(*(process_batch(batch) for batch in batches))
+
+def batch_worker():
+    """Group pending entries into batches every BATCH_SIZE entries or BATCH_MAX_AGE seconds"""
+    while True:
+        with PENDING_COND:
+            while not PENDING:
+                PENDING_COND.wait()
+            deadline = time.monotonic() + BATCH_MAX_AGE
+            while len(PENDING) < BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                PENDING_COND.wait(remaining)
+            batches = [PENDING[i:i + BATCH_SIZE] for i in range(0, len(PENDING), BATCH_SIZE)]
+            PENDING.clear()
+        asyncio.run_coroutine_threadsafe(flush_batches(batches), _ai_loop)
 
-def get_ai_response(mood, journal, sentiment):
-    """Get AI-generated comfort message and suggestions"""
-    return get_huggingface_ai_response(mood, journal, sentiment)
+def queue_ai_response(entry_id, mood, journal, sentiment):
+    """Queue a saved entry for a batched AI response"""
+    global _batch_thread, _ai_loop
+    with PENDING_COND:
+        # Started lazily so each forked worker process gets its own threads
+        if _batch_thread is None or not _batch_thread.is_alive():
+            _ai_loop = asyncio.new_event_loop()
+            threading.Thread(target=_ai_loop.run_forever, name="ai-event-loop", daemon=True).start()
+            _batch_thread = threading.Thread(target=batch_worker, name="ai-batch-worker", daemon=True)
+            _batch_thread.start()
+        PENDING.append((entry_id, mood, journal, sentiment))
+        PENDING_COND.notify()
+
+def insert_entries(rows):
+    """Insert entry rows in one statement and return their new ids in order"""
+    with app.app_context():
+        result = db.session.execute(
+            insert(MoodEntry).returning(MoodEntry.id, sort_by_parameter_order=True),
+            rows
+        )
+        entry_ids = result.scalars().all()
+        db.session.commit()
+    return entry_ids
+
+def flush_write_buffer(at_exit=False):
+    """Insert all buffered entries in one statement and queue their AI responses"""
+    global _write_failures
+    with _flush_lock:
+        rows = []
+        while WRITE_BUFFER:
+            rows.append(WRITE_BUFFER.popleft())
+        if not rows:
+            return
+        # Rows put back after a failed flush are already scored
+        unscored = [row for row in rows if 'sentiment' not in row]
+        for row, sentiment in zip(unscored, analyze_sentiments([row['journal'] for row in unscored])):
+            row['sentiment'] = sentiment
+        if at_exit:
+            # Background AI threads die with the interpreter, so store the fallback now
+            for row in rows:
+                ai_response = get_fallback_response(row['mood'], row['journal'], row['sentiment'])
+                row['comfort_message'] = ai_response['comfort']
+                row['suggestions'] = ai_response['suggestions']
+        try:
+            entry_ids = insert_entries(rows)
+            _write_failures = 0
+        except OperationalError as e:
+            # The database is unreachable: put the rows back for a later flush, up to a limit
+            _write_failures += 1
+            if at_exit or _write_failures > WRITE_MAX_RETRIES:
+                _write_failures = 0
+                print(f"❌ Dropping {len(rows)} buffered entries, database unavailable: {e}")
+            else:
+                WRITE_BUFFER.extendleft(reversed(rows))
+                print(f"❌ Failed to save {len(rows)} buffered entries, will retry: {e}")
+            return
+        except Exception as e:
+            # One bad row fails the whole statement, so save the rows one by one and drop the bad ones
+            print(f"❌ Failed to save {len(rows)} buffered entries together, saving one by one: {e}")
+            saved_rows, entry_ids = [], []
+            for row in rows:
+                try:
+                    entry_ids.extend(insert_entries([row]))
+                    saved_rows.append(row)
+                except Exception as e:
+                    print(f"❌ Dropping buffered entry that could not be saved: {e}")
+            rows = saved_rows
+    if at_exit:
+        return
+    for entry_id, row in zip(entry_ids, rows):
+        queue_ai_response(entry_id, row['mood'], row['journal'], row['sentiment'])
+
+def flush_at_exit():
+    """Save buffered entries and give still-pending entries a fallback reply on shutdown"""
+    flush_write_buffer(at_exit=True)
+    with PENDING_COND:
+        batch = list(PENDING)
+        PENDING.clear()
+    if batch:
+        save_ai_responses(batch, [get_fallback_response(mood, journal, sentiment) for _, mood, journal, sentiment in batch])
+
+def fill_missing_replies(entries):
+    """Store the fallback reply on shown entries whose AI batch was lost; True if any were filled"""
+    cutoff = datetime.utcnow() - timedelta(seconds=AI_REPLY_TIMEOUT)
+    batch = [(entry.id, entry.mood, entry.journal, entry.sentiment) for entry in entries
+             if entry.comfort_message is None and entry.date < cutoff]
+    if batch:
+        save_ai_responses(batch, [get_fallback_response(mood, journal, sentiment) for _, mood, journal, sentiment in batch])
+    return bool(batch)
+
+def write_behind_worker():
+    """Flush the write buffer every WRITE_FLUSH_INTERVAL seconds or when it fills up"""
+    while True:
+        if _write_failures:
+            # Back off while the database is unavailable
+            time.sleep(WRITE_FLUSH_INTERVAL * 2 ** min(_write_failures, 6))
+        else:
+            WRITE_BUFFER_FULL.wait(WRITE_FLUSH_INTERVAL)
+        WRITE_BUFFER_FULL.clear()
+        flush_write_buffer()
+
+def save_entry(mood, journal):
+    """Buffer a new entry for the write-behind worker"""
+    global _writer_thread
+    with _writer_lock:
+        # Started lazily so each forked worker process gets its own thread
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=write_behind_worker, name="write-behind-worker", daemon=True)
+            _writer_thread.start()
+    WRITE_BUFFER.append({'mood': mood, 'journal': journal, 'date': datetime.utcnow()})
+    if len(WRITE_BUFFER) >= WRITE_BATCH_SIZE:
+        WRITE_BUFFER_FULL.set()
+
+atexit.register(flush_at_exit)
 
 def analyze_sentiment(text):
-    """Analyze sentiment using TextBlob"""
+    """Analyze sentiment using the VADER lexicon"""
     try:
-        analysis = TextBlob(text)
-        sentiment = analysis.sentiment.polarity
+        sentiment = SENTIMENT_ANALYZER.polarity_scores(text)['compound']
         return max(-1, min(1, sentiment))
     except Exception:
         return 0.0
 
-@app.before_first_request
-def create_tables():
+def init_sentiment_pool():
+    """Start the sentiment process pool; call once per worker process, before threads start"""
+    global _sentiment_pool
+    with _sentiment_pool_lock:
+        if _sentiment_pool is None and SENTIMENT_POOL_WORKERS > 0:
+            _sentiment_pool = ProcessPoolExecutor(max_workers=SENTIMENT_POOL_WORKERS)
+            # Fork the pool's processes now rather than later from the writer thread
+            _sentiment_pool.submit(analyze_sentiment, "")
+
+def analyze_sentiments(texts):
+    """Score several journal entries, spreading larger batches across CPU cores"""
+    global _sentiment_pool
+    pool = _sentiment_pool
+    if pool is not None and len(texts) >= SENTIMENT_POOL_MIN_BATCH:
+        try:
+            return list(pool.map(analyze_sentiment, texts, timeout=SENTIMENT_TIMEOUT))
+        except BrokenProcessPool as e:
+            print(f"⚠️ Sentiment pool broken, scoring inline from now on: {e}")
+            with _sentiment_pool_lock:
+                if _sentiment_pool is pool:
+                    _sentiment_pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+        except Exception as e:
+            print(f"⚠️ Sentiment pool error, scoring inline: {e}")
+    return [analyze_sentiment(text) for text in texts]
+
+@app.cli.command("db-init")
+def db_init():
+    """Create the database tables (run once per deploy, not on every start)"""
     db.create_all()
+    print("✅ Database tables created successfully")
+
+@lru_cache(maxsize=1)
+def get_dashboard_stats(latest_entry_id):
+    """Chart JSON and summary stats, cached until a new entry is added"""
+    chart_rows = db.session.query(MoodEntry.date, MoodEntry.sentiment).order_by(MoodEntry.date.desc()).limit(10).all()
+    
+    chart_data = []
+    for date, sentiment in reversed(chart_rows):
+        chart_data.append({
+            'date': date.strftime('%Y-%m-%d'),
+            'sentiment': sentiment
+        })
+    
+    total_entries, avg_sentiment, positive_days = db.session.query(
+        func.count(MoodEntry.id),
+        func.coalesce(func.avg(MoodEntry.sentiment), 0),
+        func.coalesce(func.sum(case((MoodEntry.sentiment > 0.3, 1), else_=0)), 0)
+    ).one()
+    
+    return orjson.dumps(chart_data).decode(), total_entries, avg_sentiment, positive_days
 
 @app.route('/', methods=['GET', 'POST'])
 def index():
@@ -222,55 +588,53 @@ def index():
         
         if not mood or not journal:
             flash('⚠️ Please select a mood and write a journal entry!', 'error')
+        elif mood not in MOOD_EMOJI:
+            flash('⚠️ Please select one of the listed moods!', 'error')
+        elif len(journal) > JOURNAL_MAX_LENGTH:
+            flash(f'⚠️ Journal entries can be at most {JOURNAL_MAX_LENGTH} characters!', 'error')
         else:
             try:
-                sentiment = analyze_sentiment(journal)
-                ai_response = get_ai_response(mood, journal, sentiment)
-                
-                new_entry = MoodEntry(
-                    mood=mood,
-                    journal=journal,
-                    sentiment=sentiment,
-                    comfort_message=ai_response['comfort'],
-                    suggestions=json.dumps(ai_response['suggestions'])
-                )
-                
-                db.session.add(new_entry)
-                db.session.commit()
+                # Scored and written in the background; the AI response is filled in after the insert
+                save_entry(mood, journal)
                 
-                flash('📝 Entry saved successfully!', 'success')
+                flash('📝 Saving your entry... Dr. Mind is preparing your AI insights!', 'success')
                 return redirect(url_for('index'))
                 
             except Exception as e:
                 flash(f'⚠️ Error saving entry: {str(e)}', 'error')
     
-    entries = MoodEntry.query.order_by(MoodEntry.date.desc()).all()
+    # Only the latest entries are rendered; stats are aggregated in the database
+    # Plain rows with just the rendered columns skip ORM object construction
+    entries_query = db.session.query(
+        MoodEntry.id,
+        MoodEntry.mood,
+        MoodEntry.journal,
+        MoodEntry.sentiment,
+        MoodEntry.comfort_message,
+        MoodEntry.suggestions,
+        MoodEntry.date
+    ).order_by(MoodEntry.date.desc()).limit(RECENT_ENTRIES)
+    entries = entries_query.all()
+    if fill_missing_replies(entries):
+        entries = entries_query.all()
     
-    chart_data = []
-    for entry in entries[-10:]:
-        chart_data.append({
-            'date': entry.date.strftime('%Y-%m-%d'),
-            'sentiment': entry.sentiment
-        })
+    latest_entry_id = db.session.query(func.max(MoodEntry.id)).scalar()
+    chart_data, total_entries, avg_sentiment, positive_days = get_dashboard_stats(latest_entry_id)
     
-    total_entries = len(entries)
-    if total_entries > 0:
-        avg_sentiment = sum(entry.sentiment for entry in entries) / total_entries
-        positive_days = len([e for e in entries if e.sentiment > 0.3])
-    else:
-        avg_sentiment = 0
-        positive_days = 0
+    current_quote = pick(QUOTES)
     
-    current_quote = random.choice(QUOTES)
+    # Pop flashes before streaming starts, since the session is saved before the body is sent
+    get_flashed_messages(with_categories=True)
     
-    return render_template_string(HTML_TEMPLATE, 
-                                moods=MOODS, 
-                                entries=entries, 
-                                chart_data=json.dumps(chart_data),
-                                total_entries=total_entries,
-                                avg_sentiment=avg_sentiment,
-                                positive_days=positive_days,
-                                current_quote=current_quote)
+    return stream_template(_HTML_TPL, 
+                           moods=MOODS, 
+                           mood_emoji=MOOD_EMOJI, 
+                           entries=entries, 
+                           chart_data=chart_data,
+                           total_entries=total_entries,
+                           avg_sentiment=avg_sentiment,
+                           positive_days=positive_days,
+                           current_quote=current_quote)
 
 @app.route("/register", methods=["GET", "POST"])
 def register():
@@ -283,58 +647,42 @@ def register():
 
         if not (first_name and last_name and email and password and confirm_password):
             flash("⚠️ All fields are required!", "error")
-            return render_template_string(REGISTER_TEMPLATE, style_block=STYLE_BLOCK)
+            return render_template(_REGISTER_TPL)
 
         if password != confirm_password:
             flash("⚠️ Passwords do not match!", "error")
-            return render_template_string(REGISTER_TEMPLATE, style_block=STYLE_BLOCK)
-
-        if len(password) < 8:
-            flash("⚠️ Password must be at least 8 characters long!", "error")
-            return render_template_string(REGISTER_TEMPLATE, style_block=STYLE_BLOCK)
-
-        if not any(char.isupper() for char in password):
-            flash("⚠️ Password must contain at least one uppercase letter!", "error")
-            return render_template_string(REGISTER_TEMPLATE, style_block=STYLE_BLOCK)
-
-        if not any(char.islower() for char in password):
-            flash("⚠️ Password must contain at least one lowercase letter!", "error")
-            return render_template_string(REGISTER_TEMPLATE, style_block=STYLE_BLOCK)
-
-        if not any(char.isdigit() for char in password):
-            flash("⚠️ Password must contain at least one number!", "error")
-            return render_template_string(REGISTER_TEMPLATE, style_block=STYLE_BLOCK)
+            return render_template(_REGISTER_TPL)
 
-        if not any(char in '!@#$%^&*()_+-=[]{}|;:",.<>/?' for char in password):
-            flash("⚠️ Password must contain at least one special character!", "error")
-            return render_template_string(REGISTER_TEMPLATE, style_block=STYLE_BLOCK)
+        if not PW_POLICY.fullmatch(password):
+            flash("⚠️ Password must be at least 8 characters and include an uppercase letter, a lowercase letter, a number and a special character!", "error")
+            return render_template(_REGISTER_TPL)
 
         existing_user = User.query.filter_by(email=email).first()
         if existing_user:
             flash("⚠️ Email already registered! Please log in.", "error")
-            return render_template_string(REGISTER_TEMPLATE, style_block=STYLE_BLOCK)
+            return render_template(_REGISTER_TPL)
 
-        new_user = User(first_name=first_name, last_name=last_name, email=email, password=password)
+        new_user = User(first_name=first_name, last_name=last_name, email=email, password=PASSWORD_HASHER.hash(password))
         db.session.add(new_user)
         db.session.commit()
 
         flash("Registration successful! You can now log in.", "success")
         return redirect(url_for("login"))
-    return render_template_string(REGISTER_TEMPLATE, style_block=STYLE_BLOCK)
+    return render_template(_REGISTER_TPL)
 
 @app.route("/login", methods=["GET", "POST"])
 def login():
     if request.method == "POST":
         email = request.form.get("email")
         password = request.form.get("password")
-        user = User.query.filter_by(email=email, password=password).first()
-        if user:
+        user = User.query.filter_by(email=email).first()
+        if user and password and check_password(user, password):
             session["user"] = user.email
             flash("Login successful!", "success")
             return redirect(url_for("index"))
         else:
             flash("Invalid credentials. Please try again.", "error")
-    return render_template_string(LOGIN_TEMPLATE, style_block=STYLE_BLOCK)
+    return render_template(_LOGIN_TPL)
 
 @app.route("/logout")
 def logout():
@@ -345,9 +693,8 @@ def logout():
 @app.route('/test/huggingface')
 def test_huggingface():
     try:
-        headers = {"Authorization": f"Bearer {HUGGINGFACE_API_KEY}", "Content-Type": "application/json"}
-        data = {"model": "meta-llama/Meta-Llama-3.1-8B-Instruct", "messages": [{"role": "user", "content": "Say hello from Hugging Face!"}]}
-        resp = requests.post("https://router.huggingface.co/v1/chat/completions", headers=headers, json=data)
+        data = {"model": HF_MODEL, "messages": [{"role": "user", "content": "Say hello from Hugging Face!"}]}
+        resp = HF_SESSION.post(HF_API_URL, headers=HF_HEADERS, json=data, timeout=HF_TIMEOUT)
         return f"Hugging Face response: {resp.json()}"
     except Exception as e:
         return f"Hugging Face error: {e}", 500
@@ -355,20 +702,22 @@ def test_huggingface():
 @app.route('/test/cohere')
 def test_cohere():
     try:
-        headers = {"Authorization": f"Bearer {COHERE_API_KEY}", "Content-Type": "application/json"}
         data = {"model": "command", "prompt": "Say hello from Cohere!", "max_tokens": 20}
-        resp = requests.post("https://api.cohere.ai/v1/generate", headers=headers, json=data)
+        resp = HF_SESSION.post("https://api.cohere.ai/v1/generate", headers=COHERE_HEADERS, json=data, timeout=HF_TIMEOUT)
         return f"Cohere response: {resp.json()}"
     except Exception as e:
         return f"Cohere error: {e}", 500
 
-# Custom Jinja filter
-@app.template_filter('from_json')
-def from_json(value):
-    try:
-        return json.loads(value)
-    except:
-        return []
+@app.after_request
+def cache_static_assets(response):
+    # Only the current content hash is immutable; a stale page asking for an old
+    # version during a deploy must not pin the new file under that URL
+    if request.endpoint == 'static' and request.args.get('v') == APP_CSS_VERSION:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    return response
 
 # Error handlers for better debugging
 @app.errorhandler(500)
@@ -393,61 +742,9 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Dr. Mind - AI-Powered Mood Tracker</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
-        * { margin: 0; padding: 0; box-sizing: border-box; }
-        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; min-height: 100vh; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); overflow-x: hidden; }
-        .container { max-width: 800px; margin: 0 auto; padding: 20px; min-height: 100vh; }
-        .header { position: relative; text-align: center; margin-bottom: 30px; color: white; }
-        .profile-menu { position: absolute; top: 20px; right: 20px; z-index: 1000; }
-        .profile-button { background: rgba(255, 255, 255, 0.2); color: white; border: none; padding: 10px 15px; border-radius: 20px; cursor: pointer; font-size: 1rem; font-weight: 600; transition: background 0.3s ease; }
-        .profile-button:hover { background: rgba(255, 255, 255, 0.3); }
-        .profile-dropdown-content { display: none; position: absolute; background-color: rgba(255, 255, 255, 0.95); min-width: 160px; box-shadow: 0px 8px 16px 0px rgba(0,0,0,0.2); z-index: 1; border-radius: 10px; right: 0; margin-top: 10px; overflow: hidden; }
-        .profile-dropdown-content a { color: #333; padding: 12px 16px; text-decoration: none; display: block; font-size: 0.95rem; transition: background-color 0.3s ease; }
-        .profile-dropdown-content a:hover { background-color: #f1f1f1; }
-        .profile-menu:hover .profile-dropdown-content { display: block; }
-        .header h1 { font-size: 3rem; font-weight: 700; margin-bottom: 10px; text-shadow: 2px 2px 4px rgba(0,0,0,0.3); }
-        .header p { font-size: 1.2rem; opacity: 0.9; }
-        .main-card { background: rgba(255, 255, 255, 0.95); backdrop-filter: blur(10px); border-radius: 20px; padding: 30px; box-shadow: 0 20px 40px rgba(0,0,0,0.1); margin-bottom: 30px; }
-        .mood-section { margin-bottom: 30px; }
-        .mood-section h2 { color: #333; margin-bottom: 20px; font-size: 1.8rem; text-align: center; }
-        .mood-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(80px, 1fr)); gap: 15px; margin-bottom: 20px; }
-        .mood-option { display: flex; flex-direction: column; align-items: center; padding: 15px; border: 2px solid transparent; border-radius: 15px; cursor: pointer; transition: all 0.3s ease; background: rgba(255,255,255,0.8); }
-        .mood-option:hover { transform: translateY(-5px); box-shadow: 0 10px 20px rgba(0,0,0,0.1); }
-        .mood-option.selected { border-color: #667eea; background: linear-gradient(135deg, #667eea, #764ba2); color: white; transform: scale(1.05); }
-        .mood-emoji { font-size: 2.5rem; margin-bottom: 8px; }
-        .mood-label { font-size: 0.9rem; font-weight: 500; text-align: center; }
-        .journal-section { margin-bottom: 30px; }
-        .journal-section h2 { color: #333; margin-bottom: 15px; font-size: 1.8rem; text-align: center; }
-        .journal-input { width: 100%; max-width: 400px; min-height: 40px; padding: 10px 15px; border: 2px solid #e1e5e9; border-radius: 10px; font-size: 1rem; font-family: inherit; resize: vertical; transition: border-color 0.3s ease; background: rgba(255,255,255,0.9); margin: 0 auto; display: block; }
-        .journal-input:focus { outline: none; border-color: #667eea; box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1); }
-        .submit-btn { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; border: none; padding: 15px 30px; border-radius: 25px; font-size: 1.1rem; font-weight: 600; cursor: pointer; transition: all 0.3s ease; display: block; margin: 20px auto; min-width: 200px; }
-        .submit-btn:hover { transform: translateY(-2px); box-shadow: 0 10px 20px rgba(102, 126, 234, 0.3); }
-        .flash-message { padding: 15px; border-radius: 10px; margin: 20px 0; text-align: center; font-weight: 500; }
-        .flash-success { background: linear-gradient(135deg, #43e97b, #38f9d7); color: white; }
-        .flash-error { background: linear-gradient(135deg, #ff6b6b, #ee5a24); color: white; }
-        .entry-card { background: rgba(255,255,255,0.9); border-radius: 15px; padding: 20px; margin-bottom: 20px; box-shadow: 0 5px 15px rgba(0,0,0,0.1); }
-        .entry-header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px; }
-        .entry-mood { font-size: 2rem; }
-        .entry-date { color: #666; font-size: 0.9rem; }
-        .entry-sentiment { background: linear-gradient(135deg, #667eea, #764ba2); color: white; padding: 5px 12px; border-radius: 20px; font-size: 0.9rem; font-weight: 500; margin-bottom: 10px; display: inline-block; }
-        .entry-text { color: #333; line-height: 1.6; margin-bottom: 15px; }
-        .entry-suggestions { background: rgba(102, 126, 234, 0.1); padding: 15px; border-radius: 10px; border-left: 4px solid #667eea; }
-        .entry-suggestions h4 { color: #667eea; margin-bottom: 10px; font-size: 1rem; }
-        .entry-suggestions ul { list-style: none; padding: 0; }
-        .entry-suggestions li { margin: 5px 0; padding-left: 20px; position: relative; }
-        .entry-suggestions li:before { content: "•"; color: #667eea; position: absolute; left: 0; }
-        .chart-container { background: rgba(255,255,255,0.9); border-radius: 15px; padding: 20px; margin: 30px 0; box-shadow: 0 5px 15px rgba(0,0,0,0.1); height: 300px; }
-        .chart-container h2 { color: #333; margin-bottom: 20px; text-align: center; font-size: 1.8rem; }
-        .stats-section { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; margin: 30px 0; }
-        .stat-card { background: rgba(255,255,255,0.9); border-radius: 15px; padding: 20px; text-align: center; box-shadow: 0 5px 15px rgba(0,0,0,0.1); }
-        .stat-number { font-size: 2.5rem; font-weight: 700; color: #667eea; margin-bottom: 5px; }
-        .stat-label { color: #666; font-size: 0.9rem; }
-        .motivational-quote { background: linear-gradient(135deg, #667eea, #764ba2); color: white; padding: 25px; border-radius: 15px; text-align: center; margin: 30px 0; font-style: italic; font-size: 1.2rem; }
-        .entries-section { margin-top: 40px; }
-        .entries-section h2 { color: #333; margin-bottom: 20px; font-size: 1.8rem; text-align: center; }
-        @media (max-width: 768px) { .container { padding: 15px; } .header h1 { font-size: 2rem; } .mood-grid { grid-template-columns: repeat(auto-fit, minmax(70px, 1fr)); gap: 10px; } .mood-emoji { font-size: 2rem; } .main-card { padding: 20px; } }
-    </style>
+    <link rel="preconnect" href="https://cdn.jsdelivr.net">
+    <link rel="stylesheet" href="/static/app.css?v={{ app_css_version }}">
+    <script src="https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.js" crossorigin="anonymous"></script>
 </head>
 <body>
     <div class="container">
@@ -524,21 +821,17 @@ HTML_TEMPLATE = '''<!DOCTYPE html>
                 {% for entry in entries %}
                 <div class="entry-card">
                     <div class="entry-header">
-                        <div class="entry-mood">
-                            {% for mood in moods %}
-                                {% if mood.label == entry.mood %}{{ mood.emoji }}{% endif %}
-                            {% endfor %}
-                        </div>
+                        <div class="entry-mood">{{ mood_emoji.get(entry.mood, '') }}</div>
                         <div class="entry-date">{{ entry.date.strftime('%Y-%m-%d %H:%M') }}</div>
                     </div>
                     <div class="entry-sentiment">Sentiment: {{ "%.2f"|format(entry.sentiment) }}</div>
                     <div class="entry-text">{{ entry.journal }}</div>
                     <div class="entry-suggestions">
                         <h4>🤖 AI Response:</h4>
-                        <p><strong>Comfort:</strong> {{ entry.comfort_message }}</p>
+                        <p><strong>Comfort:</strong> {{ entry.comfort_message or 'Dr. Mind is reflecting on your entry... refresh in a moment.' }}</p>
                         <h4>Suggestions:</h4>
                         <ul>
-                            {% for suggestion in entry.suggestions|from_json %}
+                            {% for suggestion in entry.suggestions or [] %}
                                 <li>{{ suggestion }}</li>
                             {% endfor %}
                         </ul>
@@ -601,7 +894,7 @@ LOGIN_TEMPLATE = '''<!DOCTYPE html>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Login - Dr. Mind</title>
-    <style>{{style_block}}</style>
+    <link rel="stylesheet" href="/static/app.css?v={{ app_css_version }}">
 </head>
 <body>
     <div class="container">
@@ -640,7 +933,7 @@ REGISTER_TEMPLATE = '''<!DOCTYPE html>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Register - Dr. Mind</title>
-    <style>{{style_block}}</style>
+    <link rel="stylesheet" href="/static/app.css?v={{ app_css_version }}">
 </head>
 <body>
     <div class="container">
@@ -691,55 +984,82 @@ REGISTER_TEMPLATE = '''<!DOCTYPE html>
     </div>
     <script>
         const passwordInput = document.getElementById("password");
-        const reqLength = document.getElementById("req-length");
-        const reqUppercase = document.getElementById("req-uppercase");
-        const reqLowercase = document.getElementById("req-lowercase");
-        const reqNumber = document.getElementById("req-number");
-        const reqSpecial = document.getElementById("req-special");
+        // Same set as the server-side PASSWORD_SPECIAL_CHARS
+        const SPECIAL_CHARS = '!@#$%^&*()_+-=[]{}|;:",.<>/?';
 
-        passwordInput.addEventListener("keyup", function() {
-            const password = passwordInput.value;
-            if (password.length >= 8) {
-                reqLength.innerHTML = '<span class="tick-icon">✅</span> Minimum 8 characters';
-            } else {
-                reqLength.innerHTML = '<span class="tick-icon">❌</span> Minimum 8 characters';
-            }
-            if (/[A-Z]/.test(password)) {
-                reqUppercase.innerHTML = '<span class="tick-icon">✅</span> At least one uppercase letter (A–Z)';
-            } else {
-                reqUppercase.innerHTML = '<span class="tick-icon">❌</span> At least one uppercase letter (A–Z)';
-            }
-            if (/[a-z]/.test(password)) {
-                reqLowercase.innerHTML = '<span class="tick-icon">✅</span> At least one lowercase letter (a–z)';
-            } else {
-                reqLowercase.innerHTML = '<span class="tick-icon">❌</span> At least one lowercase letter (a–z)';
-            }
-            if (/[0-9]/.test(password)) {
-                reqNumber.innerHTML = '<span class="tick-icon">✅</span> At least one number (0–9)';
-            } else {
-                reqNumber.innerHTML = '<span class="tick-icon">❌</span> At least one number (0–9)';
+        function requirement(id, label) {
+            return {
+                element: document.getElementById(id),
+                met: false,
+                metHtml: '<span class="tick-icon">✅</span> ' + label,
+                unmetHtml: '<span class="tick-icon">❌</span> ' + label
+            };
+        }
+
+        const reqLength = requirement("req-length", "Minimum 8 characters");
+        const reqUppercase = requirement("req-uppercase", "At least one uppercase letter (A–Z)");
+        const reqLowercase = requirement("req-lowercase", "At least one lowercase letter (a–z)");
+        const reqNumber = requirement("req-number", "At least one number (0–9)");
+        const reqSpecial = requirement("req-special", "At least one special character (!@#$%^&* etc.)");
+
+        // Only touch the DOM when a requirement flips
+        function setRequirement(req, met) {
+            if (req.met !== met) {
+                req.met = met;
+                req.element.innerHTML = met ? req.metHtml : req.unmetHtml;
             }
-            if (/[!@#$%^&*()_+\-=\[\]{}|;:\'\",.<>\/?]/.test(password)) {
-                reqSpecial.innerHTML = '<span class="tick-icon">✅</span> At least one special character (!@#$%^&* etc.)';
-            } else {
-                reqSpecial.innerHTML = '<span class="tick-icon">❌</span> At least one special character (!@#$%^&* etc.)';
+        }
+
+        function updateRequirements() {
+            const password = passwordInput.value;
+            let hasUpper = false, hasLower = false, hasNumber = false, hasSpecial = false;
+            // One pass over the password instead of a regex test per requirement
+            for (let i = 0; i < password.length; i++) {
+                const code = password.charCodeAt(i);
+                if (code >= 65 && code <= 90) hasUpper = true;
+                else if (code >= 97 && code <= 122) hasLower = true;
+                else if (code >= 48 && code <= 57) hasNumber = true;
+                else if (SPECIAL_CHARS.indexOf(password[i]) !== -1) hasSpecial = true;
             }
+            setRequirement(reqLength, password.length >= 8);
+            setRequirement(reqUppercase, hasUpper);
+            setRequirement(reqLowercase, hasLower);
+            setRequirement(reqNumber, hasNumber);
+            setRequirement(reqSpecial, hasSpecial);
+        }
+
+        // "input" also catches paste/autofill; rAF coalesces bursts of typing into one update per frame
+        let updatePending = false;
+        passwordInput.addEventListener("input", function() {
+            if (updatePending) return;
+            updatePending = true;
+            requestAnimationFrame(function() {
+                updatePending = false;
+                updateRequirements();
+            });
         });
     </script>
 </body>
 </html>'''
 
-import re
-STYLE_BLOCK = "* { margin: 0; padding: 0; box-sizing: border-box; } body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; min-height: 100vh; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); overflow-x: hidden; } .container { max-width: 800px; margin: 0 auto; padding: 20px; min-height: 100vh; } .header { position: relative; text-align: center; margin-bottom: 30px; color: white; } .header h1 { font-size: 3rem; font-weight: 700; margin-bottom: 10px; text-shadow: 2px 2px 4px rgba(0,0,0,0.3); } .header p { font-size: 1.2rem; opacity: 0.9; } .main-card { background: rgba(255, 255, 255, 0.95); backdrop-filter: blur(10px); border-radius: 20px; padding: 30px; box-shadow: 0 20px 40px rgba(0,0,0,0.1); margin-bottom: 30px; } .journal-section { margin-bottom: 30px; } .journal-section h2 { color: #333; margin-bottom: 15px; font-size: 1.8rem; text-align: center; } .journal-input { width: 100%; max-width: 400px; min-height: 40px; padding: 10px 15px; border: 2px solid #e1e5e9; border-radius: 10px; font-size: 1rem; font-family: inherit; resize: vertical; transition: border-color 0.3s ease; background: rgba(255,255,255,0.9); margin: 0 auto; display: block; } .journal-input:focus { outline: none; border-color: #667eea; box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1); } .submit-btn { background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; border: none; padding: 15px 30px; border-radius: 25px; font-size: 1.1rem; font-weight: 600; cursor: pointer; transition: all 0.3s ease; display: block; margin: 20px auto; min-width: 200px; } .submit-btn:hover { transform: translateY(-2px); box-shadow: 0 10px 20px rgba(102, 126, 234, 0.3); } .flash-message { padding: 15px; border-radius: 10px; margin: 20px 0; text-align: center; font-weight: 500; } .flash-success { background: linear-gradient(135deg, #43e97b, #38f9d7); color: white; } .flash-error { background: linear-gradient(135deg, #ff6b6b, #ee5a24); color: white; }"
+# Compile templates once at import instead of on every request
+_HTML_TPL = app.jinja_env.from_string(HTML_TEMPLATE)
+_LOGIN_TPL = app.jinja_env.from_string(LOGIN_TEMPLATE)
+_REGISTER_TPL = app.jinja_env.from_string(REGISTER_TEMPLATE)
 
-if __name__ == '__main__':
+# Opt-in table creation at startup, e.g. for the first run of a fresh database.
+# The engine is disposed afterwards so preloaded gunicorn workers don't inherit
+# the master's pooled connection.
+if os.environ.get("DRMIND_INIT_DB"):
     try:
         with app.app_context():
             db.create_all()
+            db.engine.dispose()
             print("✅ Database tables created successfully")
     except Exception as e:
         print(f"❌ Database creation error: {e}")
-    
+
+if __name__ == '__main__':
     print("🧠 Dr. Mind is starting up...")
     print("🤖 AI system ready with Hugging Face API!")
     print("🌐 Open your browser and go to: http://localhost:5000")
@@ -749,7 +1069,13 @@ if __name__ == '__main__':
     debug_mode = os.environ.get("FLASK_ENV") == "development"
     
     try:
-        app.run(debug=debug_mode, host="0.0.0.0", port=port)
+        if debug_mode:
+            app.run(debug=True, host="0.0.0.0", port=port)
+        else:
+            # Multi-threaded production WSGI server instead of Werkzeug's dev server
+            from waitress import serve
+            init_sentiment_pool()
+            serve(app, host="0.0.0.0", port=port, threads=8)
     except Exception as e:
         print(f"❌ Failed to start server: {e}")
 
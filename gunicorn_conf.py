@@ -0,0 +1,22 @@
+import os
+import multiprocessing
+
+# Gunicorn settings for Dr. Mind (used by the Procfile)
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+# Each worker also forks DRMIND_SENTIMENT_WORKERS sentiment processes (default 0, i.e.
+# scored inline); keep it at 1-2 on small instances, since the total is multiplied by workers
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+keepalive = 30
+
+# Import the app once in the master so moods, quotes, compiled templates,
+# the sentiment lexicon and the HTTP session are shared copy-on-write by workers.
+# Background threads and pooled connections are only created after the fork.
+preload_app = True
+
+
+def post_fork(server, worker):
+    # Start the sentiment process pool (if enabled) while the worker is still single-threaded
+    from app import init_sentiment_pool
+    init_sentiment_pool()